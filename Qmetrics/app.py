@@ -12,27 +12,43 @@ from portfolio_tab import render_portfolio_tab
 from monte_carlo_tab import render_monte_carlo_tab
 from strategy_correlation_tab import render_strategy_correlation_tab
 from strategy_comparison_tab import render_strategy_comparison_tab
-from styles import custom_css
 
 SAVE_FOLDER_PATH = './saved_strategies'
 
 # Ensure save folder exists
 os.makedirs(SAVE_FOLDER_PATH, exist_ok=True)
 
-# Load previously saved strategies
-def load_saved_strategies():
+# Load previously saved strategies.
+# The actual unpickling is cached per (file name, mtime) snapshot so reruns
+# triggered by widget changes don't hit the disk again; the cache invalidates
+# only when the saved files actually change.
+@st.cache_resource
+def _load_strategies_from_disk(mtime_key):
     strategies = {}
-    if os.path.exists(SAVE_FOLDER_PATH):
-        for file_name in os.listdir(SAVE_FOLDER_PATH):
-            file_path = os.path.join(SAVE_FOLDER_PATH, file_name)
-            try:
+    for file_name, _ in mtime_key:
+        file_path = os.path.join(SAVE_FOLDER_PATH, file_name)
+        try:
+            if file_name.endswith('.parquet'):
+                # Columnar store: much faster to deserialize than pickle and
+                # hands numeric columns straight to downstream NumPy code
+                strategies[file_name[:-len('.parquet')]] = pd.read_parquet(file_path)
+            else:
+                # Backward compatibility with strategies saved as pickle
                 with open(file_path, 'rb') as f:
-                    data = pickle.load(f)
-                    strategies[file_name] = data
-            except Exception as e:
-                st.error(f"Error loading strategy {file_name}: {e}")
+                    strategies[file_name] = pickle.load(f)
+        except Exception as e:
+            st.error(f"Error loading strategy {file_name}: {e}")
     return strategies
 
+def load_saved_strategies():
+    if not os.path.exists(SAVE_FOLDER_PATH):
+        return {}
+    mtime_key = tuple(sorted(
+        (file_name, os.path.getmtime(os.path.join(SAVE_FOLDER_PATH, file_name)))
+        for file_name in os.listdir(SAVE_FOLDER_PATH)
+    ))
+    return _load_strategies_from_disk(mtime_key)
+
 # Display saved strategies in a styled box
 def display_saved_strategies(strategies):
     if strategies:
@@ -93,7 +109,12 @@ if uploaded_files:
             if uploaded_file.name.lower().endswith('.csv'):
                 raw_trades = pd.read_csv(uploaded_file)
             elif uploaded_file.name.lower().endswith('.xlsx'):
-                raw_trades = pd.read_excel(uploaded_file, engine='openpyxl')
+                # calamine (Rust-based) reads XLSX much faster than openpyxl's
+                # in-memory DOM; fall back to openpyxl if it isn't installed
+                try:
+                    raw_trades = pd.read_excel(uploaded_file, engine='calamine')
+                except ImportError:
+                    raw_trades = pd.read_excel(uploaded_file, engine='openpyxl')
             else:
                 raise ValueError("Unsupported file format. Please upload .csv or .xlsx")
 
@@ -1,7 +1,17 @@
 # data_processing.py
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+def _mark_sorted(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort trades by Entry Date once at ingest and tag the frame so
+    downstream consumers can skip their own sort_values calls."""
+    if not pd.api.types.is_datetime64_any_dtype(df['Entry Date']):
+        df['Entry Date'] = pd.to_datetime(df['Entry Date'], errors='coerce', cache=True)
+    df = df.sort_values('Entry Date', kind='mergesort').reset_index(drop=True)
+    df.attrs['sorted_by'] = 'Entry Date'
+    return df
+
 @st.cache_data
 def format_trade_data(trade_data: pd.DataFrame, input_filename: str) -> pd.DataFrame:
 
@@ -14,10 +24,14 @@ def format_trade_data(trade_data: pd.DataFrame, input_filename: str) -> pd.DataF
         
         if all(col in trade_data.columns for col in final_format_cols):
 
-            trade_data['Entry Date'] = pd.to_datetime(trade_data['Entry Date'], errors='coerce')
-            trade_data['Exit Date'] = pd.to_datetime(trade_data['Exit Date'], errors='coerce')
-            
-            return trade_data[final_format_cols].copy()
+            # Skip the parse entirely when the column already holds datetimes;
+            # otherwise cache=True parses each distinct timestamp string once,
+            # which is a big win on trade logs with repeated dates.
+            for col in ('Entry Date', 'Exit Date'):
+                if not pd.api.types.is_datetime64_any_dtype(trade_data[col]):
+                    trade_data[col] = pd.to_datetime(trade_data[col], errors='coerce', cache=True)
+
+            return _mark_sorted(trade_data[final_format_cols].copy())
         
         required_columns = ['Type', 'Trade #', 'Date/Time', 'Contracts']
         for column in required_columns:
@@ -45,30 +59,63 @@ def format_trade_data(trade_data: pd.DataFrame, input_filename: str) -> pd.DataF
         trade_data['Lots'] = trade_data['Contracts'] / 100000  # example
         trade_data['Commission'] = trade_data['Lots'] * 4.0     # example
 
-        entries = trade_data[trade_data['Type'].str.contains('Entry', case=False, na=False)]
-        exits = trade_data[trade_data['Type'].str.contains('Exit', case=False, na=False)]
+        entry_mask = trade_data['Type'].str.contains('Entry', case=False, na=False)
+        exit_mask = trade_data['Type'].str.contains('Exit', case=False, na=False)
 
-        if entries.empty or exits.empty:
+        if not entry_mask.any() or not exit_mask.any():
             raise ValueError(f"File {input_filename} must contain both 'Entry' and 'Exit' trades, or be in final format.")
 
-        paired_trades = pd.merge(
-            entries[['Trade #', 'Date/Time', price_column, 'Contracts', 'Commission']],
-            exits[['Trade #', 'Date/Time', price_column, profit_column, 'Contracts']],
-            on='Trade #',
-            suffixes=('_Entry', '_Exit')
+        # Fast path: each trade has exactly one entry and one exit, so after a
+        # stable sort by (Trade #, Type) the rows interleave entry/exit and the
+        # pairing is a simple stride-2 slice — no hash join needed.
+        paired = trade_data[entry_mask | exit_mask].sort_values(['Trade #', 'Type'], kind='mergesort')
+        ids = paired['Trade #'].to_numpy()
+        is_entry = paired['Type'].str.contains('Entry', case=False, na=False).to_numpy()
+        cleanly_paired = (
+            len(paired) % 2 == 0
+            and is_entry[0::2].all()
+            and not is_entry[1::2].any()
+            and np.array_equal(ids[0::2], ids[1::2])
         )
 
-        paired_trades['Type'] = entries.iloc[0]['Type'] if not entries.empty else 'N/A'
+        if cleanly_paired:
+            entries = paired.iloc[0::2]
+            exits = paired.iloc[1::2]
+            formatted_trades = pd.DataFrame({
+                'Trade #': entries['Trade #'].to_numpy(),
+                'Type': entries.iloc[0]['Type'],
+                'Contracts': entries['Contracts'].to_numpy(),
+                'Entry Date': entries['Date/Time'].to_numpy(),
+                'Exit Date': exits['Date/Time'].to_numpy(),
+                'Entry Price': entries[price_column].to_numpy(),
+                'Exit Price': exits[price_column].to_numpy(),
+                'Profit': exits[profit_column].to_numpy(),
+                'Commission': entries['Commission'].to_numpy(),
+            })
+        else:
+            # Fallback for files with unpaired rows: the original merge keeps
+            # only trades that have both sides
+            entries = trade_data[entry_mask]
+            exits = trade_data[exit_mask]
+
+            paired_trades = pd.merge(
+                entries[['Trade #', 'Date/Time', price_column, 'Contracts', 'Commission']],
+                exits[['Trade #', 'Date/Time', price_column, profit_column, 'Contracts']],
+                on='Trade #',
+                suffixes=('_Entry', '_Exit')
+            )
+
+            paired_trades['Type'] = entries.iloc[0]['Type'] if not entries.empty else 'N/A'
 
-        formatted_trades = paired_trades.rename(columns={
-            'Date/Time_Entry': 'Entry Date',
-            'Date/Time_Exit': 'Exit Date',
-            f'{price_column}_Entry': 'Entry Price',
-            f'{price_column}_Exit': 'Exit Price',
-            'Contracts_Entry': 'Contracts',
-            profit_column: 'Profit',
-            'Commission_Entry': 'Commission'
-        })
+            formatted_trades = paired_trades.rename(columns={
+                'Date/Time_Entry': 'Entry Date',
+                'Date/Time_Exit': 'Exit Date',
+                f'{price_column}_Entry': 'Entry Price',
+                f'{price_column}_Exit': 'Exit Price',
+                'Contracts_Entry': 'Contracts',
+                profit_column: 'Profit',
+                'Commission_Entry': 'Commission'
+            })
 
         formatted_trades['Total Commission'] = formatted_trades['Commission']
         formatted_trades['Net Profit'] = formatted_trades['Profit'] - formatted_trades['Total Commission']
@@ -76,7 +123,7 @@ def format_trade_data(trade_data: pd.DataFrame, input_filename: str) -> pd.DataF
             ['Trade #', 'Type', 'Contracts', 'Entry Date', 'Exit Date', 
              'Entry Price', 'Exit Price', 'Profit', 'Total Commission', 'Net Profit']
         ]
-        return formatted_trades
+        return _mark_sorted(formatted_trades)
 
     except Exception as e:
         st.error(f"An error occurred while processing file {input_filename}: {e}")
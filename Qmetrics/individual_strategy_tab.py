@@ -4,7 +4,7 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 from metrics_calculation import calculate_metrics
-from visualize import plot_cumulative_profit, plot_monte_carlo, monthly_performance_table, display_monte_carlo_metrics
+from visualize import render_cumulative_profit_section, plot_monte_carlo, monthly_performance_table, display_monte_carlo_metrics
 
 def render_individual_strategy_tab(strategies):
     """Render the Individual Strategy tab in the Streamlit app."""
@@ -29,12 +29,13 @@ def render_individual_strategy_tab(strategies):
             for idx, (metric, value) in enumerate(metrics.items()):
                 cols[idx % 5].metric(metric, value)
 
-            # Move the view mode toggle **right before the cumulative profit chart**
+            # View-mode toggle and chart render together inside a fragment,
+            # so switching Time/Trade doesn't rerun the rest of the tab
             st.write("### 📈 Cumulative Profit Over Time")
-            view_mode = st.radio("View cumulative profit by:", options=["Time", "Trade"], horizontal=True, key=f'view_mode_individual_{selected_strategy}')
-
-            # Display cumulative profit chart with chosen view mode
-            plot_cumulative_profit(equity_curve, date_column, selected_strategy, view_mode)
+            render_cumulative_profit_section(
+                equity_curve, date_column, selected_strategy,
+                key=f'view_mode_individual_{selected_strategy}'
+            )
 
             # Monthly Performance Table (this can stay as is)
             st.write("### 📅 Monthly Performance ($ / %)")
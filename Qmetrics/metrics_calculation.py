@@ -1,38 +1,37 @@
 import pandas as pd
 import numpy as np
 import streamlit as st
-import statsmodels.api as sm
 from utils import interpret_sqn
 
 DEFAULT_RISK_FREE_RATE = 0.02  # 2% annual risk-free rate.
 
+def _max_run_length(mask):
+    """Length of the longest run of True values in a boolean mask (run-length encoding via np.diff)."""
+    mask = np.asarray(mask, dtype=np.int8)
+    if not mask.any():
+        return 0
+    # Pad with zeros so every run has a start (0->1) and an end (1->0) transition.
+    padded = np.concatenate(([0], mask, [0]))
+    diffs = np.diff(padded)
+    starts = np.where(diffs == 1)[0]
+    ends = np.where(diffs == -1)[0]
+    return int((ends - starts).max())
+
 def max_consecutive_losses(profits):
-    max_loss_streak = 0
-    current_loss_streak = 0
-    for profit in profits:
-        if profit < 0:
-            current_loss_streak += 1
-            if current_loss_streak > max_loss_streak:
-                max_loss_streak = current_loss_streak
-        else:
-            current_loss_streak = 0
-    return max_loss_streak
+    profits = np.asarray(profits)
+    return _max_run_length(profits < 0)
 
 def max_consecutive_wins(profits):
-    max_win_streak = 0
-    current_win_streak = 0
-    for profit in profits:
-        if profit > 0:
-            current_win_streak += 1
-            if current_win_streak > max_win_streak:
-                max_win_streak = current_win_streak
-        else:
-            current_win_streak = 0
-    return max_win_streak
+    profits = np.asarray(profits)
+    return _max_run_length(profits > 0)
 
 def calculate_stability(equity_curve):
     """
     Calculate the stability (R^2) of the equity curve using linear regression.
+
+    For a single-feature fit against the time index, R^2 is the squared
+    Pearson correlation, so it reduces to a few dot products — no need to
+    run a full OLS through statsmodels.
     """
     if len(equity_curve) < 2:
         return np.nan
@@ -40,11 +39,13 @@ def calculate_stability(equity_curve):
     if equity_curve.nunique() == 1:
         return 1.0
 
-    X = np.arange(len(equity_curve))  # time index
-    y = equity_curve.values
-    X = sm.add_constant(X)
-    model = sm.OLS(y, X).fit()
-    return model.rsquared
+    y = equity_curve.to_numpy(dtype=np.float64)
+    x = np.arange(y.size, dtype=np.float64)  # time index
+    xd = x - x.mean()
+    yd = y - y.mean()
+    num = (xd * yd).sum()
+    den = np.sqrt((xd * xd).sum() * (yd * yd).sum())
+    return 0.0 if den == 0 else (num / den) ** 2
 
 def max_drawdown_period(cumulative_profit):
     """
@@ -73,7 +74,11 @@ def calculate_buy_and_hold(trades, date_column, initial_balance=10000.0):
     trades = trades.copy()
     trades[date_column] = pd.to_datetime(trades[date_column])
 
-    trades_sorted = trades.sort_values(by=date_column)
+    # Skip the sort when the frame was already sorted at ingest
+    if trades.attrs.get('sorted_by') == date_column:
+        trades_sorted = trades
+    else:
+        trades_sorted = trades.sort_values(by=date_column)
     trades_sorted = trades_sorted.drop_duplicates(subset=[date_column])
 
     # Identify first entry price and date
@@ -91,23 +96,40 @@ def calculate_buy_and_hold(trades, date_column, initial_balance=10000.0):
     if not trades_sorted.index.is_unique:
         trades_sorted = trades_sorted[~trades_sorted.index.duplicated()]
 
-    daily_prices = trades_sorted['Entry Price'].resample('D').ffill().reindex(date_range, method='ffill')
-    daily_prices = daily_prices.fillna(buy_price)
+    # A single forward-fill reindex onto the daily grid replaces the old
+    # resample('D').ffill() + reindex chain (the resample produced the same
+    # daily grid the reindex then rebuilt). Returns and balances are plain
+    # NumPy arithmetic on the resulting array.
+    prices = trades_sorted['Entry Price'].reindex(date_range, method='ffill').fillna(buy_price).to_numpy(dtype=np.float64)
+    daily_return = (prices - buy_price) / buy_price
+    cumulative_profit = (1 + daily_return) * initial_balance
 
-    daily_prices = daily_prices.reset_index()
-    daily_prices.columns = ['Date', 'Entry Price']
-
-    daily_prices['Daily Return'] = (daily_prices['Entry Price'] - buy_price) / buy_price
-    daily_prices['Cumulative Profit'] = (1 + daily_prices['Daily Return']) * initial_balance
-
-    final_balance = daily_prices['Cumulative Profit'].iloc[-1]
+    final_balance = cumulative_profit[-1]
     buy_and_hold_return_dollar = final_balance - initial_balance
     buy_and_hold_return_pct = (buy_and_hold_return_dollar / initial_balance) * 100
 
-    buy_and_hold_curve = daily_prices.set_index('Date')
+    buy_and_hold_curve = pd.DataFrame(
+        {
+            'Entry Price': prices,
+            'Daily Return': daily_return,
+            'Cumulative Profit': cumulative_profit,
+        },
+        index=pd.Index(date_range, name='Date')
+    )
     return buy_and_hold_curve, buy_and_hold_return_dollar, buy_and_hold_return_pct
 
-@st.cache_data
+def _fast_df_hash(df):
+    """
+    Cheap cache signature for trade DataFrames.
+
+    Streamlit's default hasher traverses every cell of the frame on each
+    rerun. Strategies are immutable once ingested, so shape, dtypes and the
+    raw bytes of the Net Profit column are enough to identify them.
+    """
+    profit_bytes = df['Net Profit'].to_numpy().tobytes() if 'Net Profit' in df.columns else b''
+    return (df.shape, tuple(df.dtypes.astype(str)), profit_bytes)
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _fast_df_hash})
 def calculate_metrics(
     trades,
     date_column,
@@ -122,41 +144,77 @@ def calculate_metrics(
 
     trades = trades.copy()
     trades[date_column] = pd.to_datetime(trades[date_column])
-    trades.sort_values(by=date_column, inplace=True)
-
-    total_profit = trades['Net Profit'].sum()
-    number_of_trades = len(trades)
-    winning_trades = len(trades[trades['Net Profit'] > 0])
+    # NaT dates (the ingest paths parse with errors='coerce') would get their
+    # own group below and poison the DatetimeIndex the daily resample needs
+    # to be monotonic; the baseline groupby dropped NaT keys, so do the same
+    if trades[date_column].isna().any():
+        trades = trades[trades[date_column].notna()]
+    # Strategies sorted once at ingest carry a 'sorted_by' attr; only re-sort
+    # frames that arrived unsorted (e.g. ad-hoc portfolio uploads)
+    if trades.attrs.get('sorted_by') != date_column:
+        trades.sort_values(by=date_column, inplace=True)
+
+    # Extract the Net Profit column once and derive every per-trade statistic
+    # from it, instead of re-slicing the DataFrame per metric
+    profits = trades['Net Profit'].to_numpy(dtype=np.float64)
+    pos_mask = profits > 0
+    neg_mask = profits < 0
+
+    total_profit = profits.sum()
+    number_of_trades = profits.size
+    winning_trades = int(pos_mask.sum())
     winning_percentage = (winning_trades / number_of_trades) * 100 if number_of_trades > 0 else 0
-    average_win = trades[trades['Net Profit'] > 0]['Net Profit'].mean() or 0
-    average_loss = trades[trades['Net Profit'] < 0]['Net Profit'].mean() or 0
+    average_win = profits[pos_mask].mean() if winning_trades > 0 else 0
+    average_loss = profits[neg_mask].mean() if neg_mask.any() else 0
 
     risk_reward_ratio = abs(average_loss) / average_win if average_win != 0 else np.inf
 
-    profits = trades['Net Profit'].values
-    max_consec_losses = max_consecutive_losses(profits)
-    max_consec_wins = max_consecutive_wins(profits)
+    max_consec_losses = _max_run_length(neg_mask)
+    max_consec_wins = _max_run_length(pos_mask)
 
     total_net_profit = total_profit
     total_net_profit_pct = (total_net_profit / initial_balance) * 100 if initial_balance != 0 else 0
 
-    daily_profit = trades.groupby(date_column)['Net Profit'].sum().reset_index()
-    daily_profit['Cumulative Profit'] = daily_profit['Net Profit'].cumsum() + initial_balance
-
-    equity_curve = daily_profit.set_index(date_column)
+    # Per-date profit sums via a sorted scan: trades are already sorted by
+    # date, so group boundaries fall out of np.diff and np.add.reduceat sums
+    # each run — no pandas groupby, no intermediate frames.
+    date_vals = trades[date_column].to_numpy()
+    net_vals = trades['Net Profit'].to_numpy(dtype=np.float64)
+    group_starts = np.concatenate(([0], np.flatnonzero(np.diff(date_vals.view('i8'))) + 1))
+    daily_sums = np.add.reduceat(net_vals, group_starts)
+
+    equity_curve = pd.DataFrame(
+        {
+            'Net Profit': daily_sums,
+            'Cumulative Profit': np.cumsum(daily_sums) + initial_balance,
+        },
+        index=pd.DatetimeIndex(date_vals[group_starts], name=date_column)
+    )
 
     # -- FIX #1: replace `.fillna(method='ffill')` with pure `.ffill()`:
     equity_curve = equity_curve.resample('D').ffill()  # forward-fill daily frequency
     # (No second fill needed unless you really want it repeated)
     
-    equity_curve['Daily Return'] = equity_curve['Cumulative Profit'].pct_change().fillna(0)
-
-    # Worst 5% of daily returns
-    worst_5_percent = equity_curve['Daily Return'].nsmallest(int(len(equity_curve) * 0.05))
-    expected_shortfall = worst_5_percent.mean()
-
-    trades_std_dev = trades['Net Profit'].std()
-    expectancy = trades['Net Profit'].mean()
+    # Daily returns computed directly on the underlying ndarray (avoids the
+    # pct_change + fillna Series allocations on the hot path)
+    vals = equity_curve['Cumulative Profit'].to_numpy(dtype=np.float64)
+    daily_ret = np.empty_like(vals)
+    daily_ret[0] = 0.0
+    np.divide(np.diff(vals), vals[:-1], out=daily_ret[1:])
+    equity_curve['Daily Return'] = daily_ret
+
+    # Worst 5% of daily returns via np.partition (O(N) selection instead of a
+    # full sort). A single-day curve has no tail to average — keep the
+    # baseline NaN instead of asking partition for an out-of-bounds kth.
+    if daily_ret.size > 1:
+        k = min(max(1, int(daily_ret.size * 0.05)), daily_ret.size - 1)
+        worst_5_percent = np.partition(daily_ret, k)[:k]
+        expected_shortfall = worst_5_percent.mean()
+    else:
+        expected_shortfall = np.nan
+
+    trades_std_dev = profits.std(ddof=1) if number_of_trades > 1 else 0
+    expectancy = profits.mean() if number_of_trades > 0 else 0
     sqn = (expectancy / trades_std_dev) * np.sqrt(number_of_trades) if trades_std_dev != 0 else 0
 
     mean_daily_return = equity_curve['Daily Return'].mean()
@@ -2,19 +2,30 @@
 
 import numpy as np
 import pandas as pd
+from numba import njit, prange
 
 def monte_carlo_simulation(
-    trades: pd.DataFrame,
+    trades,
     num_simulations: int = 1000,
     num_trades: int = None,
     method: str = "random_choice",
     seed: int = None
 ) -> np.ndarray:
 
-    if 'Profit' not in trades.columns:
-        raise KeyError("The input DataFrame must contain a 'Profit' column.")
+    # Accept either a trades DataFrame with a 'Profit' column or a plain
+    # 1-D array of profits, so callers don't need to build a DataFrame
+    # just to feed the sampler.
+    if isinstance(trades, pd.DataFrame):
+        if 'Profit' not in trades.columns:
+            raise KeyError("The input DataFrame must contain a 'Profit' column.")
+        profits = trades['Profit'].to_numpy()
+    else:
+        profits = np.asarray(trades)
+        if profits.ndim != 1:
+            raise ValueError("trades must be a DataFrame or a 1D array of profits.")
+        if not np.issubdtype(profits.dtype, np.floating):
+            profits = profits.astype(np.float64)
 
-    profits = trades['Profit'].values
     total_trades_available = len(profits)
 
     if num_trades is None:
@@ -28,26 +39,178 @@ def monte_carlo_simulation(
             f"For 'randomized_shuffling', num_trades ({num_trades}) cannot exceed the total number of available trades ({total_trades_available})."
         )
 
-    # Set seed for reproducibility if provided
-    if seed is not None:
-        np.random.seed(seed)
+    # Generator API is seeded per call for reproducibility and is faster than the legacy RandomState
+    rng = np.random.default_rng(seed)
 
     if method == "random_choice":
         # Sample trades with replacement
-        simulated_trades = np.random.choice(profits, size=(num_simulations, num_trades), replace=True)
+        simulated_trades = rng.choice(profits, size=(num_simulations, num_trades), replace=True)
     elif method == "randomized_shuffling":
-        # Sample trades without replacement by shuffling
-        # Initialize an empty array to store simulations
-        simulated_trades = np.empty((num_simulations, num_trades))
-        # Shuffle profits once and tile them if num_trades == total_trades_available
-        # Otherwise, perform shuffling per simulation
-        for i in range(num_simulations):
-            shuffled_profits = np.random.permutation(profits)
-            simulated_trades[i, :] = shuffled_profits[:num_trades]
-    
+        # Batched shuffle: argsort a matrix of random keys to get an independent
+        # permutation per row, then gather the profits once. Avoids a Python-level
+        # np.random.permutation call (and a full copy) per simulation.
+        keys = rng.random((num_simulations, total_trades_available), dtype=np.float32)
+        order = np.argsort(keys, axis=1)[:, :num_trades]
+        simulated_trades = profits[order]
+
     return simulated_trades
 
 
+@njit(parallel=True, cache=True)
+def _cumulative_stats(simulated_trades, initial_balance):
+    # Fused pass: cumulative balance, running max, and max drawdown per row
+    # in a single sweep instead of cumsum + maximum.accumulate + subtract.
+    n, t = simulated_trades.shape
+    cumulative = np.empty_like(simulated_trades)
+    max_dd = np.empty(n, np.float64)
+    for i in prange(n):
+        cum = initial_balance
+        # Seed the peak from the first curve point, not the starting balance,
+        # so the drawdown definition matches calculate_max_drawdown (a first
+        # losing trade is not itself a drawdown)
+        peak = -np.inf
+        dd = 0.0
+        for j in range(t):
+            cum += simulated_trades[i, j]
+            if cum > peak:
+                peak = cum
+            d = peak - cum
+            if d > dd:
+                dd = d
+            cumulative[i, j] = cum
+        max_dd[i] = dd
+    return cumulative, max_dd
+
+
+def simulation_cumulative_stats(simulated_trades: np.ndarray, initial_balance: float):
+    """
+    Compute cumulative profit curves and per-simulation max drawdown in one pass.
+
+    Returns a tuple (cumulative_profits, max_drawdowns) where cumulative_profits
+    has the same shape (and dtype) as simulated_trades and max_drawdowns has one
+    entry per simulation.
+    """
+    if simulated_trades.ndim != 2:
+        raise ValueError("simulated_trades must be a 2D array.")
+
+    return _cumulative_stats(np.ascontiguousarray(simulated_trades), float(initial_balance))
+
+
+def monte_carlo_chunked(
+    profits: np.ndarray,
+    num_simulations: int = 1000,
+    initial_balance: float = 10000.0,
+    num_trades: int = None,
+    chunk_size: int = 512,
+    sample_curves: int = 100,
+    seed: int = None
+):
+    """
+    Run the random-choice Monte Carlo simulation in fixed-size chunks.
+
+    Instead of materializing the full (num_simulations, num_trades) matrix —
+    hundreds of MB for large runs — each chunk is drawn, turned into
+    cumulative curves, folded into the running statistics and discarded.
+    Per-column 5%/95% bands stay exact: only the order statistics needed for
+    the interpolated quantiles are retained between chunks.
+
+    Returns a tuple:
+    - sample: up to `sample_curves` cumulative curves for plotting
+    - mean_curve: per-step mean cumulative balance
+    - lower, upper: exact 5th/95th percentile curves
+    - final_balances: terminal balance per simulation
+    - max_drawdowns: max drawdown per simulation
+    """
+    profits = np.asarray(profits)
+    if profits.ndim != 1:
+        raise ValueError("profits must be a 1D array.")
+    if not np.issubdtype(profits.dtype, np.floating):
+        profits = profits.astype(np.float64)
+
+    if num_trades is None:
+        num_trades = len(profits)
+
+    rng = np.random.default_rng(seed)
+
+    n = num_simulations
+    t = num_trades
+    # Depth of order statistics needed for the interpolated 5%/95% quantiles
+    k = int(np.ceil((n - 1) * 0.05)) + 2
+
+    col_sum = np.zeros(t, dtype=np.float64)
+    final_balances = np.empty(n, dtype=np.float64)
+    max_drawdowns = np.empty(n, dtype=np.float64)
+    lowest = None   # k smallest values per column seen so far
+    highest = None  # k largest values per column seen so far
+    sample_rows = []
+    sampled = 0
+
+    done = 0
+    while done < n:
+        m = min(chunk_size, n - done)
+        chunk = rng.choice(profits, size=(m, t), replace=True)
+        cumulative, dd = simulation_cumulative_stats(chunk, initial_balance)
+
+        final_balances[done:done + m] = cumulative[:, -1]
+        max_drawdowns[done:done + m] = dd
+        col_sum += cumulative.sum(axis=0, dtype=np.float64)
+
+        if sampled < sample_curves:
+            take = min(sample_curves - sampled, m)
+            sample_rows.append(cumulative[:take].copy())
+            sampled += take
+
+        # Keep only the k smallest / k largest values per column
+        lowest = cumulative if lowest is None else np.concatenate((lowest, cumulative), axis=0)
+        if lowest.shape[0] > k:
+            lowest = np.partition(lowest, k - 1, axis=0)[:k]
+        highest = cumulative if highest is None else np.concatenate((highest, cumulative), axis=0)
+        if highest.shape[0] > k:
+            highest = np.partition(highest, highest.shape[0] - k, axis=0)[-k:]
+
+        done += m
+
+    mean_curve = col_sum / n
+
+    # Interpolated quantiles from the retained order statistics. The 5th
+    # percentile sits at fractional ascending position (n-1)*0.05 and the
+    # 95th at the mirrored position from the top — both within depth k.
+    pos = (n - 1) * 0.05
+    i0 = int(np.floor(pos))
+    frac = pos - i0
+    lo_sorted = np.sort(lowest, axis=0)
+    lower = lo_sorted[i0] * (1 - frac) + lo_sorted[min(i0 + 1, k - 1)] * frac
+    hi_sorted = np.sort(highest, axis=0)[::-1]
+    upper = hi_sorted[i0] * (1 - frac) + hi_sorted[min(i0 + 1, k - 1)] * frac
+
+    sample = np.concatenate(sample_rows, axis=0) if sample_rows else np.empty((0, t))
+    return sample, mean_curve, lower, upper, final_balances, max_drawdowns
+
+
+@njit(parallel=True, cache=True)
+def _max_drawdown(cumulative_profits, as_percentage):
+    # One read-only sweep per row with a scalar running max, instead of
+    # materializing roll_max and drawdown matrices the size of the input.
+    n, t = cumulative_profits.shape
+    out = np.empty(n, np.float64)
+    for i in prange(n):
+        peak = cumulative_profits[i, 0]
+        dd = 0.0
+        for j in range(t):
+            v = cumulative_profits[i, j]
+            if v > peak:
+                peak = v
+            if as_percentage:
+                # Avoid division by zero at zero peaks (no drawdown possible)
+                d = (peak - v) / (1.0 if peak == 0 else peak) * 100.0
+            else:
+                d = peak - v
+            if d > dd:
+                dd = d
+        out[i] = dd
+    return out
+
+
 def calculate_max_drawdown(cumulative_profits: np.ndarray, as_percentage: bool = False) -> np.ndarray:
 
     if not isinstance(cumulative_profits, np.ndarray):
@@ -58,49 +221,38 @@ def calculate_max_drawdown(cumulative_profits: np.ndarray, as_percentage: bool =
     elif cumulative_profits.ndim != 2:
         raise ValueError("cumulative_profits must be a 1D or 2D array.")
 
-    # Compute the rolling maximum for each simulation
-    roll_max = np.maximum.accumulate(cumulative_profits, axis=1)
-    # Compute drawdowns
-    drawdowns = roll_max - cumulative_profits
-    if as_percentage:
-        # Avoid division by zero by setting zero peaks to one (no drawdown possible)
-        safe_roll_max = np.where(roll_max == 0, 1, roll_max)
-        drawdowns = (drawdowns / safe_roll_max) * 100  # Percentage drawdown
-
     # Return the maximum drawdown per simulation
-    return drawdowns.max(axis=1)
+    return _max_drawdown(np.ascontiguousarray(cumulative_profits), as_percentage)
+
 
+@njit(parallel=True, cache=True)
+def _max_streak(sign_mask):
+    # Scalar streak counters per row; no temporaries allocated in the inner loop.
+    n, t = sign_mask.shape
+    out = np.zeros(n, dtype=np.int64)
+    for i in prange(n):
+        current = 0
+        longest = 0
+        for j in range(t):
+            if sign_mask[i, j]:
+                current += 1
+                if current > longest:
+                    longest = current
+            else:
+                current = 0
+        out[i] = longest
+    return out
 
 def calculate_max_consecutive_losing_trades(simulated_trades: np.ndarray) -> np.ndarray:
 
     if simulated_trades.ndim != 2:
         raise ValueError("simulated_trades must be a 2D array.")
 
-    losing = simulated_trades < 0
-    max_streaks = np.zeros(losing.shape[0], dtype=int)
-    current_streak = np.zeros(losing.shape[0], dtype=int)
-
-    for i in range(losing.shape[1]):
-        # Increment streak where losing, reset where not
-        current_streak = np.where(losing[:, i], current_streak + 1, 0)
-        # Update max streaks
-        max_streaks = np.maximum(max_streaks, current_streak)
-
-    return max_streaks
+    return _max_streak(simulated_trades < 0)
 
 def calculate_max_consecutive_winning_trades(simulated_trades: np.ndarray) -> np.ndarray:
 
     if simulated_trades.ndim != 2:
         raise ValueError("simulated_trades must be a 2D array.")
 
-    winning = simulated_trades > 0
-    max_streaks = np.zeros(winning.shape[0], dtype=int)
-    current_streak = np.zeros(winning.shape[0], dtype=int)
-
-    for i in range(winning.shape[1]):
-        # Increment streak where winning, reset where not
-        current_streak = np.where(winning[:, i], current_streak + 1, 0)
-        # Update max streaks
-        max_streaks = np.maximum(max_streaks, current_streak)
-
-    return max_streaks
+    return _max_streak(simulated_trades > 0)
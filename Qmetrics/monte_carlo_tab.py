@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 import streamlit as st
-from monte_carlo import monte_carlo_simulation
+from monte_carlo import monte_carlo_chunked
 from visualize import plot_monte_carlo, display_monte_carlo_metrics
 
 def render_monte_carlo_tab(strategies, portfolio_selection):
@@ -17,43 +17,62 @@ def render_monte_carlo_tab(strategies, portfolio_selection):
     )
 
     if selected_monte_carlo_strategies:
-        # Combine selected strategies' trades
-        selected_trades = pd.concat([strategies[s] for s in selected_monte_carlo_strategies])
+        # The simulation only consumes the Profit column, so stack just those
+        # arrays instead of concatenating and sorting the full DataFrames.
+        # (Trade order doesn't matter to the sampler anyway.) float32 halves
+        # the bandwidth of the simulation matrices and is ample for P&L shown
+        # at two decimals.
+        profits = np.concatenate([
+            strategies[s]['Profit'].to_numpy(dtype=np.float32)
+            for s in selected_monte_carlo_strategies
+        ])
 
-        # Ensure that the 'Entry Date' column is in datetime format
-        if 'Entry Date' in selected_trades.columns:
-            selected_trades['Entry Date'] = pd.to_datetime(selected_trades['Entry Date'], errors='coerce')
-
-        # Sort the combined trades by 'Entry Date' in chronological order
-        selected_trades = selected_trades.sort_values(by='Entry Date')
+        # Earliest entry date across the selection anchors the simulation date axis
+        entry_date_mins = [
+            pd.to_datetime(strategies[s]['Entry Date'], errors='coerce').min()
+            for s in selected_monte_carlo_strategies
+            if 'Entry Date' in strategies[s].columns
+        ]
+        start_date = min((d for d in entry_date_mins if pd.notna(d)), default=pd.NaT)
 
         initial_balance = st.number_input("Set the initial balance (USD):", min_value=0.0, value=10000.0)
 
-        # Display combined trades
-        st.write(f"### Combined Trades for Selected Strategies ({', '.join(selected_monte_carlo_strategies)})")
-        st.dataframe(selected_trades)
+        # Display combined trades (built only for display, inside the expander)
+        with st.expander(f"Combined Trades for Selected Strategies ({', '.join(selected_monte_carlo_strategies)})"):
+            selected_trades = pd.concat([strategies[s] for s in selected_monte_carlo_strategies])
+            if 'Entry Date' in selected_trades.columns:
+                selected_trades['Entry Date'] = pd.to_datetime(selected_trades['Entry Date'], errors='coerce')
+                selected_trades = selected_trades.sort_values(by='Entry Date')
+            st.dataframe(selected_trades)
 
         # Run Monte Carlo Simulation
         num_simulations = st.number_input("Number of Simulations:", min_value=100, max_value=10000, value=1000, step=100)
         if st.button("Run Monte Carlo Simulation"):
             with st.spinner('Running Monte Carlo Simulation...'):
-                simulated_trades = monte_carlo_simulation(selected_trades, num_simulations)
-                cumulative_profits = np.cumsum(simulated_trades, axis=1) + initial_balance
-                sim_mean_curve = cumulative_profits.mean(axis=0)
-                sim_lower = np.percentile(cumulative_profits, 5, axis=0)
-                sim_upper = np.percentile(cumulative_profits, 95, axis=0)
-
-                # Ensure the 'Entry Date' is properly used to define the date range
-                if not pd.api.types.is_datetime64_any_dtype(selected_trades['Entry Date']):
-                    st.error("Error: 'Entry Date' is not in datetime format.")
+                # Stream the simulation in chunks: peak memory stays bounded by
+                # the chunk size instead of growing with num_simulations, while
+                # the mean/band curves and per-simulation stats remain exact
+                sample_curves, sim_mean_curve, sim_lower, sim_upper, final_balances, max_drawdowns = \
+                    monte_carlo_chunked(profits, num_simulations, initial_balance)
+
+                # Ensure a valid start date was found to define the date range
+                if pd.isna(start_date):
+                    st.error("Error: no valid 'Entry Date' found in the selected strategies.")
                     return
 
                 # Use the correct datetime format for simulation dates
-                simulation_dates = pd.date_range(start=selected_trades['Entry Date'].min(), periods=len(sim_mean_curve), freq='D')
-                simulation_df = pd.DataFrame(cumulative_profits, columns=simulation_dates)
+                simulation_dates = pd.date_range(start=start_date, periods=len(sim_mean_curve), freq='D')
+                # Store column-major so each date column is contiguous — the
+                # downstream per-column aggregations are much faster that way
+                simulation_df = pd.DataFrame(np.asfortranarray(sample_curves), columns=simulation_dates)
 
                 # Plot Monte Carlo results
                 plot_monte_carlo(simulation_df, sim_mean_curve, sim_lower, sim_upper)
 
                 # Display Monte Carlo Metrics Table
-                display_monte_carlo_metrics(cumulative_profits, initial_balance)
+                display_monte_carlo_metrics(
+                    None,
+                    initial_balance,
+                    max_dd=max_drawdowns,
+                    final_balances=final_balances
+                )
@@ -5,8 +5,9 @@ import numpy as np
 import streamlit as st
 from metrics_calculation import calculate_metrics
 from monte_carlo import monte_carlo_simulation
+from sharpe_kernel import sharpe_from_sorted
 from visualize import (
-    plot_cumulative_profit,
+    render_cumulative_profit_section,
     plot_monte_carlo,
     display_monte_carlo_metrics
 )
@@ -16,33 +17,72 @@ def import_portfolio_file():
     uploaded_file = st.file_uploader("Upload Portfolio Export File", type=["csv"])
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
+            # Arrow's multi-threaded CSV reader is several times faster than
+            # the default C engine on multi-MB exports; fall back if pyarrow
+            # is missing or rejects the file
+            try:
+                df = pd.read_csv(uploaded_file, engine='pyarrow')
+            except (ImportError, ValueError):
+                uploaded_file.seek(0)
+                df = pd.read_csv(uploaded_file)
+            if 'Strategy' in df.columns:
+                # Categorical strategy labels: filters and maps compare small
+                # integer codes instead of Python strings
+                df['Strategy'] = df['Strategy'].astype('category')
+            # Parse the date columns once at upload; every consumer downstream
+            # checks the dtype and skips its own conversion
+            for col in ('Entry Date', 'Exit Date'):
+                if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+                    df[col] = pd.to_datetime(df[col], errors='coerce', cache=True)
             st.success("File uploaded successfully!")
             return df
         except Exception as e:
             st.error(f"Error loading file: {e}")
     return None
 
-def calculate_portfolio_sharpe_ratio(combined_portfolio_trades, initial_balance=10000, annual_risk_free_rate=0.02):
-    combined_portfolio_trades['Entry Date'] = pd.to_datetime(combined_portfolio_trades['Entry Date'])
-    daily_profit = combined_portfolio_trades.groupby('Entry Date', observed=False)['Net Profit'].sum().reset_index()
-    # FIX #2: explicitly specify `observed=False` if you rely on old grouping behavior 
-    #   (the future default will be True)
-    
-    daily_profit['Cumulative Profit'] = daily_profit['Net Profit'].cumsum() + initial_balance
-    daily_profit['Daily Return'] = daily_profit['Cumulative Profit'].pct_change().fillna(0)
+def calculate_portfolio_sharpe_ratio(combined_portfolio_trades, initial_balance=10000, annual_risk_free_rate=0.02, return_daily=False):
+    # Sort the trades by calendar day once, then hand the sorted arrays to the
+    # fused Numba kernel: per-day sums, cumulative balance, returns and the
+    # Sharpe moments all come out of one compiled pass.
+    entry_dates = combined_portfolio_trades['Entry Date']
+    if not pd.api.types.is_datetime64_any_dtype(entry_dates):
+        entry_dates = pd.to_datetime(entry_dates, cache=True)
+    dates = entry_dates.to_numpy('datetime64[D]')
+    net = combined_portfolio_trades['Net Profit'].to_numpy(dtype=np.float64)
+    # NaT dates (coerced parse failures) argsort to the end and would fold
+    # into a bogus trailing day; the baseline groupby excluded NaT keys
+    valid = ~np.isnat(dates)
+    if not valid.all():
+        dates = dates[valid]
+        net = net[valid]
+    order = np.argsort(dates, kind='stable')
     daily_risk_free_rate = annual_risk_free_rate / 252
-    daily_profit['Excess Daily Return'] = daily_profit['Daily Return'] - daily_risk_free_rate
-    mean_excess_return = daily_profit['Excess Daily Return'].mean()
-    std_excess_return = daily_profit['Excess Daily Return'].std()
-    sharpe_ratio = (mean_excess_return / std_excess_return) * np.sqrt(252) if std_excess_return != 0 else 0
+
+    sharpe_ratio, days, daily_sum, cumulative, daily_return = sharpe_from_sorted(
+        dates[order].view('i8'), net[order], float(initial_balance), daily_risk_free_rate
+    )
+
+    # Both render paths only use the scalar, so the daily breakdown frame is
+    # opt-in rather than built (and discarded) on every call
+    if not return_daily:
+        return sharpe_ratio
+
+    daily_profit = pd.DataFrame({
+        'Entry Date': days.astype('datetime64[D]'),
+        'Net Profit': daily_sum,
+        'Cumulative Profit': cumulative,
+        'Daily Return': daily_return,
+        'Excess Daily Return': daily_return - daily_risk_free_rate,
+    })
     return sharpe_ratio, daily_profit
 
 def adjust_risk_per_trade(portfolio_trades, strategies, initial_balance, default_risk_per_trade=100.0):
     st.markdown("## Risk Management Settings")
     st.markdown("Adjust the risk per trade for each strategy below:")
 
-    adjusted_trades_list = []
+    # The widget loop only collects a scaling factor per strategy; the actual
+    # adjustment is a single vectorized multiply afterwards
+    scaling_factors = {}
     for strategy in strategies:
         with st.expander(f"Strategy: {strategy}"):
             risk_option = st.selectbox(
@@ -69,75 +109,136 @@ def adjust_risk_per_trade(portfolio_trades, strategies, initial_balance, default
                 desired_risk = initial_balance * (desired_risk_pct / 100.0)
                 scaling_factor = desired_risk / default_risk_per_trade if default_risk_per_trade != 0 else 1.0
 
-            strategy_trades = portfolio_trades[portfolio_trades['Strategy'] == strategy].copy()
-            strategy_trades['Net Profit'] = strategy_trades['Net Profit'] * scaling_factor
-            adjusted_trades_list.append(strategy_trades)
+            scaling_factors[strategy] = scaling_factor
+
+    if not scaling_factors:
+        return portfolio_trades
 
-    if adjusted_trades_list:
-        adjusted_portfolio_trades = pd.concat(adjusted_trades_list, ignore_index=True)
-    else:
-        adjusted_portfolio_trades = portfolio_trades.copy()
+    # Net Profit is the only column that changes, so work on it alone: gather
+    # each row's factor through the categorical codes (small int indexing, no
+    # per-row string hashing) and hand the scaled buffer to .assign — the
+    # untouched columns ride along without a row-wise copy of the blotter
+    strategy_col = portfolio_trades['Strategy']
+    if not isinstance(strategy_col.dtype, pd.CategoricalDtype):
+        strategy_col = strategy_col.astype('category')
+    codes = strategy_col.cat.codes.to_numpy()
+    factors_arr = np.array(
+        [scaling_factors.get(s, 1.0) for s in strategy_col.cat.categories],
+        dtype=np.float64
+    )
+    base_profit = portfolio_trades['Net Profit'].to_numpy(dtype=np.float64)
+    # Rows with a NaN strategy carry categorical code -1, which a plain
+    # gather would wrap to the last category's factor; leave them unscaled
+    # like the baseline per-strategy filters did
+    factors = factors_arr[np.maximum(codes, 0)]
+    if (codes < 0).any():
+        factors = np.where(codes >= 0, factors, 1.0)
+    return portfolio_trades.assign(**{'Net Profit': base_profit * factors})
 
-    return adjusted_portfolio_trades
+_MONTH_ORDER = [
+    'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+    'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'
+]
 
 def monthly_performance_table(df, date_column, initial_balance, mode="Dollar ($)"):
     """Display the monthly performance table with a toggle between Dollar and Percentage view."""
-    # Ensure the date column is in datetime format
-    df[date_column] = pd.to_datetime(df[date_column])
-    
-    # Extract Year, Month, and Month Number
-    df['Year'] = df[date_column].dt.year.astype(str)  # Convert year to string for grouping
-    df['Month'] = df[date_column].dt.month_name().str.slice(stop=3)    # Short month name for readability
-    df['Month_Num'] = df[date_column].dt.month       # Numeric month for sorting
-    
-    # Group by Year and Month_Num to calculate monthly profit
-    monthly_profit = df.groupby(['Year', 'Month_Num', 'Month'])['Net Profit'].sum().reset_index()
-    
-    # Pivot the table to have months as columns
-    monthly_pivot = monthly_profit.pivot_table(
-        index=['Year'],
-        columns='Month',
-        values='Net Profit',
-        fill_value=0
-    )
-    
-    # Ensure months are ordered correctly
-    # Create a list of month names in order
-    month_order = [
-        'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-        'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'
-    ]
-    # Reindex the columns to ensure correct order
-    monthly_pivot = monthly_pivot.reindex(columns=month_order, fill_value=0)
-    
+    # Ensure the date column is in datetime format (O(1) dtype check when the
+    # upload path already parsed it)
+    if not pd.api.types.is_datetime64_any_dtype(df[date_column]):
+        df[date_column] = pd.to_datetime(df[date_column], cache=True)
+
+    # Drop NaT rows first: the upload path parses dates with errors='coerce',
+    # and a NaT turns dt.year into float NaN — poisoning the integer grid
+    # indices below. The old groupby/pivot_table dropped them silently too.
+    dates = df[date_column]
+    if dates.isna().any():
+        valid = dates.notna()
+        dates = dates[valid]
+        df = df.loc[valid]
+    if dates.empty:
+        st.warning("No dated trades to display in the monthly performance table.")
+        return
+
+    # The destination grid is tiny and known (years x 12), so scatter-add the
+    # profits straight into it — no groupby, no pivot_table
+    years = dates.dt.year.to_numpy()
+    months = dates.dt.month.to_numpy()
+    profits = df['Net Profit'].to_numpy(dtype=np.float64)
+    first_year = int(years.min())
+    grid = np.zeros((int(years.max()) - first_year + 1, 12))
+    np.add.at(grid, (years - first_year, months - 1), profits)
+
     # Calculate YTD (Year-to-Date) performance for each year
-    monthly_pivot['YTD'] = monthly_pivot.sum(axis=1)
-    
+    ytd = grid.sum(axis=1, keepdims=True)
+
+    monthly_pivot = pd.DataFrame(np.hstack([grid, ytd]), columns=_MONTH_ORDER + ['YTD'])
+    monthly_pivot.insert(0, 'Year', [str(y) for y in range(first_year, first_year + grid.shape[0])])
+
     # Convert to percentage if selected
     if mode == "Percentage (%)":
-        monthly_pivot = (monthly_pivot / initial_balance) * 100
-    
-    # Reset index to turn 'Year' back into a column
-    monthly_pivot = monthly_pivot.reset_index()
-    
-    # Format the values for display
-    if mode == "Dollar ($)":
-        formatted_performance = monthly_pivot.copy()
-        for col in formatted_performance.columns:
-            if col != 'Year':
-                formatted_performance[col] = formatted_performance[col].apply(lambda x: f"${x:,.2f}")
-    else:
-        formatted_performance = monthly_pivot.copy()
-        for col in formatted_performance.columns:
-            if col != 'Year':
-                formatted_performance[col] = formatted_performance[col].apply(lambda x: f"{x:.2f}%")
-    
+        value_cols = monthly_pivot.columns[1:]
+        monthly_pivot[value_cols] = (monthly_pivot[value_cols] / initial_balance) * 100
+
+    # Format via a Styler instead of a per-cell .apply loop: one vectorized
+    # formatting pass, and the underlying frame stays numeric
+    value_columns = [col for col in monthly_pivot.columns if col != 'Year']
+    fmt = "${:,.2f}" if mode == "Dollar ($)" else "{:.2f}%"
+    styled_performance = monthly_pivot.style.format(fmt, subset=value_columns)
+
     # Display the table using st.dataframe for size control
     st.dataframe(
-        formatted_performance,
+        styled_performance,
         width=1000,
-        height=min(400, len(formatted_performance) * 35 + 40)
+        height=min(400, len(monthly_pivot) * 35 + 40)
+    )
+
+def _render_portfolio_block(trades, initial_balance, title_prefix, key_ns):
+    """Shared metrics/plot/table tail for an adjusted portfolio.
+
+    Both render_portfolio_tab branches ran the same pipeline with only the
+    headings and widget keys differing, so the body lives here once; the
+    expensive pieces (calculate_metrics, the Sharpe kernel) keep their own
+    caching, so a widget change in one branch doesn't recompute the other.
+    """
+    st.subheader(f"✅ {title_prefix} Data")
+    st.dataframe(trades)
+
+    metrics, equity_curve = calculate_metrics(
+        trades,
+        'Entry Date',
+        initial_balance,
+        include_buy_and_hold=False
+    )
+    sharpe_ratio = calculate_portfolio_sharpe_ratio(trades, initial_balance)
+    st.metric(f"📈 Sharpe Ratio ({title_prefix})", f"{sharpe_ratio:.2f}")
+
+    st.subheader("📊 Performance Metrics")
+    metrics_cols = st.columns(5)
+    for idx, (metric, value) in enumerate(metrics.items()):
+        if isinstance(value, (int, float, np.number)):
+            display_value = f"{value:.2f}"
+        else:
+            display_value = str(value)
+        metrics_cols[idx % 5].metric(metric, display_value)
+
+    st.subheader(f"📈 Cumulative Profit Over Time/Trade ({title_prefix})")
+    # Radio + chart live in a fragment: toggling the view reruns only them
+    render_cumulative_profit_section(
+        equity_curve,
+        'Entry Date',
+        title_prefix,
+        label="📊 View Cumulative Profit By:",
+        key=f"{key_ns}_view_mode"
+    )
+
+    st.subheader(f"📅 Monthly Performance ({title_prefix})")
+    performance_mode = st.radio(
+        "🔍 Select the View Mode:",
+        ["Dollar ($)", "Percentage (%)"],
+        horizontal=True,
+        key=f"{key_ns}_performance_mode"
     )
+    monthly_performance_table(trades, 'Entry Date', initial_balance, performance_mode)
 
 def render_portfolio_tab(strategies, portfolio_selection):
     """Render the Portfolio tab in the Streamlit app."""
@@ -166,57 +267,23 @@ def render_portfolio_tab(strategies, portfolio_selection):
             initial_balance=initial_balance
         )
 
-        st.subheader("✅ Adjusted Portfolio Data")
-        st.dataframe(adjusted_portfolio_trades)
-
-        metrics, equity_curve = calculate_metrics(
-            adjusted_portfolio_trades,
-            'Entry Date',
-            initial_balance,
-            include_buy_and_hold=False
-        )
-        sharpe_ratio, daily_profit = calculate_portfolio_sharpe_ratio(
-            adjusted_portfolio_trades,
-            initial_balance
-        )
-        st.metric("📈 Sharpe Ratio (Adjusted Portfolio)", f"{sharpe_ratio:.2f}")
-
-        st.subheader("📊 Performance Metrics")
-        metrics_cols = st.columns(5)
-        for idx, (metric, value) in enumerate(metrics.items()):
-            if isinstance(value, (int, float, np.number)):
-                display_value = f"{value:.2f}"
-            else:
-                display_value = str(value)
-            metrics_cols[idx % 5].metric(metric, display_value)
-
-        st.subheader("📈 Cumulative Profit Over Time/Trade (Adjusted Portfolio)")
-        view_mode = st.radio(
-            "📊 View Cumulative Profit By:",
-            options=["Time", "Trade"],
-            horizontal=True,
-            key="imported_view_mode"
-        )
-        plot_cumulative_profit(equity_curve, 'Entry Date', "Adjusted Portfolio", view_mode)
-
-        st.subheader("📅 Monthly Performance (Adjusted Portfolio)")
-        performance_mode = st.radio(
-            "🔍 Select the View Mode:",
-            ["Dollar ($)", "Percentage (%)"],
-            horizontal=True,
-            key="imported_performance_mode"
-        )
-        monthly_performance_table(
+        _render_portfolio_block(
             adjusted_portfolio_trades,
-            'Entry Date',
             initial_balance,
-            performance_mode
+            "Adjusted Portfolio",
+            key_ns="imported"
         )
 
     if portfolio_selection:
         st.subheader("🎯 Selected Strategies in the Portfolio")
-        combined_trades = [strategies[s].copy().assign(Strategy=s) for s in portfolio_selection]
-        selected_portfolio_trades = pd.concat(combined_trades, ignore_index=True)
+        # Tag strategies through the concat keys instead of copying every
+        # frame just to append a constant Strategy column
+        selected_portfolio_trades = (
+            pd.concat({s: strategies[s] for s in portfolio_selection}, names=['Strategy'])
+            .reset_index(level=0)
+            .reset_index(drop=True)
+        )
+        selected_portfolio_trades['Strategy'] = selected_portfolio_trades['Strategy'].astype('category')
         selected_portfolio_trades['Entry Date'] = pd.to_datetime(selected_portfolio_trades['Entry Date'], errors='coerce')
         selected_portfolio_trades.sort_values(by='Entry Date', inplace=True)
 
@@ -241,49 +308,9 @@ def render_portfolio_tab(strategies, portfolio_selection):
             initial_balance=initial_balance_selected
         )
 
-        st.subheader("✅ Adjusted Selected Portfolio Data")
-        st.dataframe(adjusted_selected_trades)
-
-        metrics_selected, equity_curve_selected = calculate_metrics(
-            adjusted_selected_trades,
-            'Entry Date',
-            initial_balance_selected,
-            include_buy_and_hold=False
-        )
-        sharpe_ratio_selected, daily_profit_selected = calculate_portfolio_sharpe_ratio(
-            adjusted_selected_trades,
-            initial_balance_selected
-        )
-        st.metric("📈 Sharpe Ratio (Adjusted Selected Portfolio)", f"{sharpe_ratio_selected:.2f}")
-
-        st.subheader("📊 Performance Metrics")
-        metrics_selected_cols = st.columns(5)
-        for idx, (metric, value) in enumerate(metrics_selected.items()):
-            if isinstance(value, (int, float, np.number)):
-                display_value = f"{value:.2f}"
-            else:
-                display_value = str(value)
-            metrics_selected_cols[idx % 5].metric(metric, display_value)
-
-        st.subheader("📈 Cumulative Profit Over Time/Trade (Adjusted Selected Portfolio)")
-        view_mode_selected = st.radio(
-            "📊 View Cumulative Profit By:",
-            options=["Time", "Trade"],
-            horizontal=True,
-            key="selected_view_mode"
-        )
-        plot_cumulative_profit(equity_curve_selected, 'Entry Date', "Adjusted Selected Portfolio", view_mode_selected)
-
-        st.subheader("📅 Monthly Performance (Adjusted Selected Portfolio)")
-        performance_mode_selected = st.radio(
-            "🔍 Select the View Mode:",
-            ["Dollar ($)", "Percentage (%)"],
-            horizontal=True,
-            key="selected_performance_mode"
-        )
-        monthly_performance_table(
+        _render_portfolio_block(
             adjusted_selected_trades,
-            'Entry Date',
             initial_balance_selected,
-            performance_mode_selected
+            "Adjusted Selected Portfolio",
+            key_ns="selected"
         )
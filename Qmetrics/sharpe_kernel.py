@@ -0,0 +1,54 @@
+# sharpe_kernel.py
+
+import numpy as np
+from numba import njit
+
+@njit(cache=True, fastmath=True)
+def sharpe_from_sorted(day_keys, net, initial_balance, rf_daily):
+    """
+    Fused daily-return / Sharpe kernel over trades sorted by day.
+
+    day_keys are int64 day numbers (datetime64[D] viewed as i8) in ascending
+    order, net the matching per-trade profits. One linear loop closes each day,
+    then a second loop over the (much smaller) daily arrays fuses cumsum,
+    returns and the Welford moments of the excess returns — no intermediate
+    full-length arrays.
+
+    Returns (sharpe, days, daily_sum, cumulative, daily_return).
+    """
+    n = day_keys.size
+    days = np.empty(n, np.int64)
+    daily_sum = np.empty(n, np.float64)
+    count = 0
+    for i in range(n):
+        if count == 0 or day_keys[i] != days[count - 1]:
+            days[count] = day_keys[i]
+            daily_sum[count] = net[i]
+            count += 1
+        else:
+            daily_sum[count - 1] += net[i]
+
+    cumulative = np.empty(count, np.float64)
+    daily_return = np.empty(count, np.float64)
+    running = initial_balance
+    mean = 0.0
+    m2 = 0.0
+    for j in range(count):
+        running += daily_sum[j]
+        cumulative[j] = running
+        r = 0.0 if j == 0 else cumulative[j] / cumulative[j - 1] - 1.0
+        daily_return[j] = r
+        e = r - rf_daily
+        d = e - mean
+        mean += d / (j + 1)
+        m2 += d * (e - mean)
+
+    sharpe = 0.0
+    if count > 1:
+        variance = m2 / (count - 1)
+        if variance > 0.0:
+            sharpe = mean / np.sqrt(variance) * np.sqrt(252.0)
+    return sharpe, days[:count], daily_sum[:count], cumulative, daily_return
+
+# Warm up the JIT at import so the first interaction doesn't pay compilation
+sharpe_from_sorted(np.zeros(1, np.int64), np.zeros(1, np.float64), 10000.0, 0.02 / 252)
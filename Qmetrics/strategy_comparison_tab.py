@@ -91,11 +91,17 @@ def render_strategy_comparison_tab(strategies):
     # Merge equity curves on date
     equity_curve1.rename(columns={date_column1: 'Date', 'Cumulative Profit': strategy1_name}, inplace=True)
     equity_curve2.rename(columns={date_column2: 'Date', 'Cumulative Profit': strategy2_name}, inplace=True)
-    merged_equity = pd.merge(
-        equity_curve1[['Date', strategy1_name]],
-        equity_curve2[['Date', strategy2_name]],
-        on='Date', how='outer'
-    ).sort_values('Date').fillna(method='ffill')
+    # Union-reindex both curves onto one shared date index instead of an
+    # outer hash-join + sort: the union of two sorted DatetimeIndexes is a
+    # merge of sorted sequences, already ordered, and reindex+ffill carries
+    # each curve across the other's missing dates
+    curve1 = equity_curve1.set_index('Date')[strategy1_name]
+    curve2 = equity_curve2.set_index('Date')[strategy2_name]
+    shared_dates = curve1.index.union(curve2.index)
+    merged_equity = pd.DataFrame({
+        strategy1_name: curve1.reindex(shared_dates).ffill(),
+        strategy2_name: curve2.reindex(shared_dates).ffill(),
+    }).reset_index()
 
     fig = px.line(
         merged_equity,